@@ -1,7 +1,17 @@
-from flask import Flask, request, jsonify, redirect, g
+from flask import Flask, Response, request, jsonify, redirect, g
 from flask_restful import Resource, Api
 from flask_cors import CORS
 import sqlite3
+import base64
+import csv
+import hashlib
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.http import http_date
 from flask_swagger_ui import get_swaggerui_blueprint
 
 app = Flask(__name__)
@@ -9,26 +19,125 @@ api = Api(app)
 CORS(app)
 
 
-# Database helpers: per-request connection (safer & better concurrency)
+# Database helpers: per-request connection checked out from a shared pool
 DATABASE = 'bookdb.db'
+DB_POOL_SIZE = 8
+DB_POOL_TIMEOUT = 30.0
+# Exports hold a connection for the whole download, so they get their own
+# small pool and fail fast instead of starving request handlers
+EXPORT_POOL_SIZE = 2
+EXPORT_POOL_TIMEOUT = 1.0
+
+class PoolTimeout(ServiceUnavailable):
+    description = "Database connection pool exhausted, try again later."
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of preconfigured SQLite connections.
+
+    Connections are opened lazily up to ``size``; once all are in use,
+    callers wait up to ``timeout`` seconds for one to be released.
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA cache_size=-20000",      # ~20 MB page cache per connection
+        "PRAGMA mmap_size=268435456",    # 256 MB memory-mapped I/O
+    )
+
+    def __init__(self, database, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._opened = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self.checkouts = 0
+        self.waits = 0
+        self.peak_in_use = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        with self._cond:
+            self.checkouts += 1
+            if not self._idle and self._opened >= self.size:
+                self.waits += 1
+                available = lambda: self._idle or self._opened < self.size
+                if not self._cond.wait_for(available, self.timeout):
+                    raise PoolTimeout()
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                self._opened += 1
+            self._in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self._in_use)
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._opened -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        return conn
+
+    def release(self, conn):
+        # Never hand out a connection with a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "opened": self._opened,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "peak_in_use": self.peak_in_use,
+            }
+
+db_pool = ConnectionPool(DATABASE)
+export_pool = ConnectionPool(DATABASE, size=EXPORT_POOL_SIZE, timeout=EXPORT_POOL_TIMEOUT)
 
 def get_db():
     if 'db' not in g:
-        conn = sqlite3.connect(DATABASE)
-        conn.row_factory = sqlite3.Row
-        g.db = conn
+        g.db = db_pool.acquire()
     return g.db
 
 def close_db(e=None):
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        db_pool.release(db)
 
 @app.teardown_appcontext
 def teardown_db(exception):
     close_db(exception)
 
 
+# Current time as Unix seconds, evaluated inside SQLite
+NOW_SQL = "((julianday('now') - 2440587.5) * 86400.0)"
+
+def ensure_column(c, table, column, decl):
+    columns = [r[1] for r in c.execute(f"PRAGMA table_info({table})")]
+    if column in columns:
+        return False
+    c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    return True
+
 # Initialize DB and seed sample data (runs once at import under app context)
 def init_db():
     conn = sqlite3.connect(DATABASE)
@@ -37,11 +146,29 @@ def init_db():
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         title TEXT NOT NULL,
         author TEXT NOT NULL,
-        published_year INTEGER)""")
+        published_year INTEGER,
+        updated_at REAL)""")
+    if ensure_column(c, "books", "updated_at", "REAL"):
+        c.execute(f"UPDATE books SET updated_at = {NOW_SQL}")
+    # Row count maintained by triggers so listings never need COUNT(*).
+    # Seeded once from the existing table, before the triggers exist.
+    c.execute("""CREATE TABLE IF NOT EXISTS book_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total INTEGER NOT NULL,
+        version INTEGER NOT NULL DEFAULT 0,
+        updated_at REAL)""")
+    ensure_column(c, "book_stats", "version", "INTEGER NOT NULL DEFAULT 0")
+    ensure_column(c, "book_stats", "updated_at", "REAL")
+    c.execute(f"INSERT OR IGNORE INTO book_stats (id, total, updated_at) SELECT 1, COUNT(*), {NOW_SQL} FROM books")
+    c.execute("""CREATE TRIGGER IF NOT EXISTS books_count_insert AFTER INSERT ON books
+        BEGIN UPDATE book_stats SET total = total + 1 WHERE id = 1; END""")
+    c.execute("""CREATE TRIGGER IF NOT EXISTS books_count_delete AFTER DELETE ON books
+        BEGIN UPDATE book_stats SET total = total - 1 WHERE id = 1; END""")
+    init_version_triggers(c)
+    init_search_index(c)
     conn.commit()
 
-    c.execute("SELECT COUNT(*) FROM books")
-    if c.fetchone()[0] == 0:
+    if get_book_total(conn) == 0:
         sample_books = [
             ("Clean Code", "Robert C. Martin", 2008),
             ("Design Patterns", "GoF", 1994),
@@ -57,6 +184,227 @@ def init_db():
     conn.close()
 
 
+# Cache validators: every row carries updated_at, and book_stats holds a
+# table-level version/updated_at bumped on any change to books.
+def init_version_triggers(c):
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS books_stamp_insert AFTER INSERT ON books
+        WHEN new.updated_at IS NULL
+        BEGIN UPDATE books SET updated_at = {NOW_SQL} WHERE id = new.id; END""")
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS books_stamp_update
+        AFTER UPDATE OF title, author, published_year ON books
+        BEGIN UPDATE books SET updated_at = {NOW_SQL} WHERE id = new.id; END""")
+    for event in ("INSERT", "DELETE", "UPDATE"):
+        c.execute(f"""CREATE TRIGGER IF NOT EXISTS books_version_{event.lower()} AFTER {event} ON books
+            BEGIN UPDATE book_stats SET version = version + 1, updated_at = {NOW_SQL} WHERE id = 1; END""")
+
+# Full-text search: external-content FTS5 index over title/author, kept in
+# sync with books by triggers. An index created on an existing database is
+# populated straight away; rebuild_search_index() re-derives it on demand.
+def init_search_index(c):
+    exists = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+    ).fetchone()
+    c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        title, author,
+        content='books', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""")
+    c.execute("""CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+        END""")
+    c.execute("""CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+        END""")
+    c.execute("""CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title, author ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+        END""")
+    if not exists:
+        c.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+
+def rebuild_search_index():
+    conn = sqlite3.connect(DATABASE)
+    conn.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+    conn.commit()
+    conn.close()
+
+@app.cli.command('rebuild-search')
+def rebuild_search_command():
+    """Rebuild the books full-text search index from the books table."""
+    rebuild_search_index()
+    print("Search index rebuilt.")
+
+def build_match_query(q):
+    # Every term is quoted (so FTS5 operators in user input are inert) and
+    # prefix-matched; terms are ANDed together.
+    terms = q.split()
+    return ' '.join('"' + t.replace('"', '""') + '"*' for t in terms)
+
+def make_etag(*parts):
+    return hashlib.sha1(':'.join(str(p) for p in parts).encode()).hexdigest()[:20]
+
+def validator_headers(etag, last_modified):
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(int(last_modified))
+    return headers
+
+def not_modified(etag, last_modified):
+    """Return a 304 response if the request's validators match, else None.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted when
+    no entity tag was sent (RFC 9110 section 13.2.2).
+    """
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)  # weak comparison, section 13.1.2
+    elif request.if_modified_since and last_modified is not None:
+        matched = int(last_modified) <= request.if_modified_since.timestamp()
+    else:
+        matched = False
+    if matched:
+        return Response(status=304, headers=validator_headers(etag, last_modified))
+    return None
+
+# Read-through response cache. The backend is pluggable: anything that
+# implements CacheBackend (e.g. a Redis adapter) can replace MemoryCache.
+CACHE_TTL = 60
+CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+class CacheBackend:
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None, epoch=None):
+        """Store ``value``; if ``epoch`` is given and is no longer current, skip it."""
+        raise NotImplementedError
+
+    def bump_epoch(self):
+        raise NotImplementedError
+
+    def delete(self, *keys):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with per-entry TTL and a total size budget.
+
+    Entry sizes are estimated from their JSON encoding; least recently used
+    entries are evicted until a new entry fits within ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+        self.epoch = 0  # bumped on every invalidation, see set()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value, ttl=None, epoch=None):
+        size = len(key) + len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            # Checked under the lock so an invalidation cannot slip in between
+            if epoch is not None and epoch != self.epoch:
+                return
+            if key in self._entries:
+                self._remove(key)
+            while self.bytes + size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            self._entries[key] = (expires_at, size, value)
+            self.bytes += size
+
+    def bump_epoch(self):
+        with self._lock:
+            self.epoch += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._remove(key)
+
+    def _remove(self, key):
+        self.bytes -= self._entries.pop(key)[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+response_cache = MemoryCache()
+
+def invalidate_books(book_id=None):
+    """Drop cached entries affected by a write to books (call after commit)."""
+    # Bumped first: any read loaded before this point is refused by set()
+    response_cache.bump_epoch()
+    if book_id is not None:
+        response_cache.delete(f"book:{book_id}")
+    response_cache.delete_prefix("list:")
+
+def cache_store(key, entry, epoch):
+    # Skip the store if a write invalidated the cache while this entry was
+    # being loaded, so a stale read cannot repopulate it.
+    response_cache.set(key, entry, epoch=epoch)
+
+def cached_response(entry):
+    cached = not_modified(entry["etag"], entry["last_modified"])
+    if cached is not None:
+        return cached
+    return entry["body"], 200, validator_headers(entry["etag"], entry["last_modified"])
+
+def get_table_version(conn):
+    return conn.execute("SELECT version, updated_at FROM book_stats WHERE id = 1").fetchone()
+
+def get_book_total(conn):
+    return conn.execute("SELECT total FROM book_stats WHERE id = 1").fetchone()[0]
+
+def parse_bool_arg(name, default):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    return value.lower() not in ('false', '0', 'no')
+
+
 # Swagger UI
 SWAGGER_URL = '/docs'
 API_URL = '/static/swagger.yaml'
@@ -72,62 +420,327 @@ app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 def index():
     return redirect(SWAGGER_URL)
 
+@app.route('/debug/pool')
+def pool_stats():
+    return jsonify(dict(db_pool.stats(), export=export_pool.stats()))
+
+@app.route('/debug/cache')
+def cache_stats():
+    return jsonify(response_cache.stats())
+
+# Opaque pagination cursors: base64url-encoded JSON holding the last seen id
+def encode_cursor(last_id):
+    raw = json.dumps({"id": last_id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))["id"]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(last_id, int):
+        raise ValueError("Invalid cursor")
+    return last_id
+
 # Resource API
 class BookList(Resource):
     def get(self):
+        key = "list:" + request.query_string.decode()
+        entry = response_cache.get(key)
+        if entry is None:
+            epoch = response_cache.epoch
+            # List pages share the table-level version: any insert/delete
+            # changes every page's ETag, and a match is answered before the
+            # page query runs.
+            conn = get_db()
+            version, updated_at = get_table_version(conn)
+            etag = make_etag("list", version, request.query_string.decode())
+            cached = not_modified(etag, updated_at)
+            if cached is not None:
+                return cached
+            body, status = self._load_page(conn)
+            if status != 200:
+                return body, status
+            entry = {"body": body, "etag": etag, "last_modified": updated_at}
+            cache_store(key, entry, epoch)
+        return cached_response(entry)
+
+    def _load_page(self, conn):
         try:
             page = int(request.args.get('page', 1))
             limit = int(request.args.get('limit', 5))
         except ValueError:
             page = 1
             limit = 5
+
+        after = request.args.get('after')
+        if after is not None:
+            return self._get_after(after, limit, parse_bool_arg('include_total', False))
+
         offset = (page - 1) * limit
-        conn = get_db()
-        cur = conn.execute("SELECT id, title, author, published_year FROM books LIMIT ? OFFSET ?", (limit, offset))
+        cur = conn.execute("SELECT id, title, author, published_year FROM books ORDER BY id LIMIT ? OFFSET ?", (limit, offset))
         rows = cur.fetchall()
         result = [{"id": r[0], "title": r[1], "author": r[2], "published_year": r[3]} for r in rows]
 
-        total = conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+        body = {"page": page, "limit": limit}
+        if parse_bool_arg('include_total', True):
+            body["total"] = get_book_total(conn)
+        body["books"] = result
+        return body, 200
 
-        return {
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "books": result
-        }, 200
+    def _get_after(self, after, limit, include_total):
+        # Keyset pagination: seek past the cursor on the primary key instead of
+        # scanning and discarding OFFSET rows, so every page costs the same.
+        if limit < 1:
+            return {"message": "limit must be a positive integer"}, 400
+        if after == '':
+            last_id = 0
+        else:
+            try:
+                last_id = decode_cursor(after)
+            except ValueError:
+                return {"message": "Invalid cursor"}, 400
+        conn = get_db()
+        # Fetch one extra row to know whether another page exists
+        rows = conn.execute(
+            "SELECT id, title, author, published_year FROM books WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, limit + 1)
+        ).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        result = [{"id": r[0], "title": r[1], "author": r[2], "published_year": r[3]} for r in rows]
+
+        body = {"limit": limit, "next_cursor": encode_cursor(rows[-1][0]) if has_more else None}
+        if include_total:
+            body["total"] = get_book_total(conn)
+        body["books"] = result
+        return body, 200
 
     def post(self):
         data = request.get_json()
         conn = get_db()
         cur = conn.execute(
-            "INSERT INTO books (title, author, published_year) VALUES (?, ?, ?)",
+            f"INSERT INTO books (title, author, published_year, updated_at) VALUES (?, ?, ?, {NOW_SQL})",
             (data["title"], data["author"], data["published_year"])
         )
         conn.commit()
+        invalidate_books()
         book_id = cur.lastrowid
         return {"id": book_id, **data}, 201
 
 class Book(Resource):
     def get(self, book_id):
-        conn = get_db()
-        r = conn.execute(
-            "SELECT id, title, author, published_year FROM books WHERE id=?",
-            (book_id,)
-        ).fetchone()
-        if r:
-            return {"id": r[0], "title": r[1], "author": r[2], "published_year": r[3]}, 200
-        return {"message": "Book not found"}, 404
+        key = f"book:{book_id}"
+        entry = response_cache.get(key)
+        if entry is None:
+            epoch = response_cache.epoch
+            conn = get_db()
+            r = conn.execute(
+                "SELECT id, title, author, published_year, updated_at FROM books WHERE id=?",
+                (book_id,)
+            ).fetchone()
+            if not r:
+                return {"message": "Book not found"}, 404
+            entry = {
+                "body": {"id": r[0], "title": r[1], "author": r[2], "published_year": r[3]},
+                "etag": make_etag("book", r[0], r[4]),
+                "last_modified": r[4]
+            }
+            cache_store(key, entry, epoch)
+        return cached_response(entry)
 
     def delete(self, book_id):
         conn = get_db()
         cur = conn.execute("DELETE FROM books WHERE id=?", (book_id,))
         conn.commit()
         if cur.rowcount:
+            invalidate_books(book_id)
             return {"message": "Book deleted"}, 200
         return {"message": "Book not found"}, 404
 
+# Bulk import: JSON array or NDJSON stream, inserted in chunked transactions
+BULK_DEFAULT_CHUNK = 1000
+BULK_MAX_CHUNK = 10000
+
+def validate_book(data):
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    for field in ("title", "author"):
+        value = data.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"'{field}' must be a non-empty string")
+    year = data.get("published_year")
+    if year is not None and (not isinstance(year, int) or isinstance(year, bool)):
+        raise ValueError("'published_year' must be an integer")
+    return (data["title"], data["author"], year)
+
+def iter_bulk_payload():
+    # NDJSON is parsed line by line straight off the request stream so large
+    # uploads never have to be held in memory as a single document.
+    if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield ValueError("Malformed JSON line")
+        return
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array or an NDJSON body")
+    yield from data
+
+class BookBulk(Resource):
+    INSERT_SQL = f"INSERT INTO books (title, author, published_year, updated_at) VALUES (?, ?, ?, {NOW_SQL})"
+
+    def post(self):
+        try:
+            chunk_size = int(request.args.get('chunk_size', BULK_DEFAULT_CHUNK))
+        except ValueError:
+            chunk_size = BULK_DEFAULT_CHUNK
+        chunk_size = max(1, min(chunk_size, BULK_MAX_CHUNK))
+
+        conn = get_db()
+        inserted = 0
+        received = 0
+        errors = []
+        chunk = []
+        try:
+            for index, item in enumerate(iter_bulk_payload()):
+                received += 1
+                try:
+                    if isinstance(item, ValueError):
+                        raise item
+                    chunk.append((index, validate_book(item)))
+                except ValueError as exc:
+                    errors.append({"index": index, "error": str(exc)})
+                if len(chunk) >= chunk_size:
+                    inserted += self._insert_chunk(conn, chunk, errors)
+                    chunk = []
+        except ValueError as exc:
+            return {"message": str(exc)}, 400
+        if chunk:
+            inserted += self._insert_chunk(conn, chunk, errors)
+        if inserted:
+            invalidate_books()
+
+        if received == 0:
+            return {"message": "No books provided"}, 400
+        errors.sort(key=lambda e: e["index"])
+        return {
+            "received": received,
+            "inserted": inserted,
+            "failed": len(errors),
+            "errors": errors
+        }, 201 if inserted else 400
+
+    def _insert_chunk(self, conn, chunk, errors):
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(self.INSERT_SQL, [row for _, row in chunk])
+            conn.commit()
+            return len(chunk)
+        except sqlite3.Error:
+            conn.rollback()
+        # A row the database rejected: retry the chunk row by row in one
+        # transaction so only the offending rows are reported.
+        inserted = 0
+        conn.execute("BEGIN")
+        for index, row in chunk:
+            try:
+                conn.execute(self.INSERT_SQL, row)
+                inserted += 1
+            except sqlite3.Error as exc:
+                errors.append({"index": index, "error": str(exc)})
+        conn.commit()
+        return inserted
+
+class BookSearch(Resource):
+    def get(self):
+        q = request.args.get('q', '').strip()
+        if not q:
+            return {"message": "Query parameter 'q' is required"}, 400
+        try:
+            limit = int(request.args.get('limit', 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, 100))
+
+        conn = get_db()
+        # bm25 ranks title matches twice as heavily as author matches
+        rows = conn.execute(
+            """SELECT b.id, b.title, b.author, b.published_year
+               FROM books_fts JOIN books b ON b.id = books_fts.rowid
+               WHERE books_fts MATCH ?
+               ORDER BY bm25(books_fts, 2.0, 1.0)
+               LIMIT ?""",
+            (build_match_query(q), limit)
+        ).fetchall()
+        result = [{"id": r[0], "title": r[1], "author": r[2], "published_year": r[3]} for r in rows]
+        return {"q": q, "limit": limit, "books": result}, 200
+
+# Streaming export: rows are pulled from the cursor in batches and written
+# out as they arrive, so memory stays flat regardless of table size.
+EXPORT_BATCH = 1000
+EXPORT_COLUMNS = ("id", "title", "author", "published_year")
+
+def iter_export_rows(conn):
+    cur = conn.execute("SELECT id, title, author, published_year FROM books ORDER BY id")
+    try:
+        while True:
+            rows = cur.fetchmany(EXPORT_BATCH)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+def export_ndjson(conn):
+    for rows in iter_export_rows(conn):
+        yield ''.join(json.dumps(dict(zip(EXPORT_COLUMNS, r)), ensure_ascii=False) + '\n' for r in rows)
+
+def export_csv(conn):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in iter_export_rows(conn):
+        writer.writerows(rows)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+class BookExport(Resource):
+    FORMATS = {
+        'ndjson': (export_ndjson, 'application/x-ndjson'),
+        'csv': (export_csv, 'text/csv'),
+    }
+
+    def get(self):
+        fmt = request.args.get('format', 'ndjson').lower()
+        if fmt not in self.FORMATS:
+            return {"message": "format must be one of: ndjson, csv"}, 400
+        generate, mimetype = self.FORMATS[fmt]
+        # Checked out before streaming starts so a busy export pool is a 503,
+        # and returned on close even if the client disconnects early
+        conn = export_pool.acquire()
+        response = Response(
+            generate(conn),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename=books.{fmt}"}
+        )
+        response.call_on_close(lambda: export_pool.release(conn))
+        return response
+
 # Routes
 api.add_resource(BookList, '/api/v1/books')
+api.add_resource(BookBulk, '/api/v1/books:bulk')
+api.add_resource(BookExport, '/api/v1/books/export')
+api.add_resource(BookSearch, '/api/v1/books/search')
 api.add_resource(Book, '/api/v1/books/<int:book_id>')
 
 # Ensure DB is initialized when module is loaded
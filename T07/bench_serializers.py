@@ -0,0 +1,49 @@
+"""Micro-benchmark: marshmallow schemas vs. the fast-path dict serializers.
+
+Builds unsaved Book/Author instances (no database access) and times dumping
+them through both paths for every (version, details) combination.
+
+    python bench_serializers.py [--books 1000] [--repeat 20]
+"""
+import argparse
+import timeit
+
+from versioned_library_api import (
+    BOOK_SERIALIZERS,
+    Author,
+    Book,
+    get_book_schema,
+    serialize_books,
+)
+
+
+def make_books(count):
+    authors = [Author(id=i, name=f"Author {i}") for i in range(1, 51)]
+    return [
+        Book(id=i, title=f"Book {i}", author=authors[i % len(authors)], available=bool(i % 3))
+        for i in range(1, count + 1)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=1000, help="books per dump")
+    parser.add_argument("--repeat", type=int, default=20, help="dumps per measurement")
+    args = parser.parse_args()
+
+    books = make_books(args.books)
+    print(f"{'version':<8}{'details':<9}{'marshmallow ms':>16}{'fast path ms':>14}{'speedup':>9}")
+    for version, detailed in BOOK_SERIALIZERS:
+        schema = get_book_schema(version, detailed, many=True)
+        if schema.dump(books) != serialize_books(books, version, detailed):
+            raise SystemExit(f"Serializers disagree for {version} details={detailed}")
+
+        slow = min(timeit.repeat(lambda: schema.dump(books), number=args.repeat, repeat=3))
+        fast = min(timeit.repeat(lambda: serialize_books(books, version, detailed), number=args.repeat, repeat=3))
+        slow_ms = slow / args.repeat * 1000
+        fast_ms = fast / args.repeat * 1000
+        print(f"{version:<8}{str(detailed):<9}{slow_ms:>16.2f}{fast_ms:>14.2f}{slow / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,11 @@
-from flask import Blueprint, request
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from flask import Blueprint, Response, jsonify, request, url_for
 from apiflask import APIFlask, Schema, fields, abort
 from peewee import (
     SqliteDatabase,
@@ -8,9 +15,55 @@ from peewee import (
     AutoField,
     DoesNotExist,
     ForeignKeyField,
+    chunked,
 )
 
-db = SqliteDatabase("library.db")
+class InstrumentedSqliteDatabase(SqliteDatabase):
+    """SqliteDatabase that notifies listeners of every SQL statement it runs."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._query_listeners = []
+
+    def add_query_listener(self, listener):
+        self._query_listeners.append(listener)
+
+    def remove_query_listener(self, listener):
+        self._query_listeners.remove(listener)
+
+    def execute_sql(self, sql, params=None, *args, **kwargs):
+        for listener in self._query_listeners:
+            listener(sql, params)
+        return super().execute_sql(sql, params, *args, **kwargs)
+
+class QueryCounter:
+    """Context manager recording the statements run against ``database``.
+
+        with QueryCounter(db) as counter:
+            client.get("/v2/authors/1/books")
+        assert counter.count == 2
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.queries = []
+
+    def _record(self, sql, params):
+        self.queries.append((sql, params))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def __enter__(self):
+        self.queries = []
+        self.database.add_query_listener(self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.database.remove_query_listener(self._record)
+
+db = InstrumentedSqliteDatabase("library.db")
 
 class BaseModel(Model):
     class Meta:
@@ -30,20 +83,143 @@ def initialize_database():
     db.connect(reuse_if_open=True)
     db.create_tables([Author, Book])
 
+class VersionedResponseCache:
+    """LRU cache of serialized responses with TTL and tag-based invalidation.
+
+    Entries are keyed by (version, route, resource id, query params, details)
+    and tagged with the rows they were built from, e.g. ``("book", 1)`` or
+    ``("author", 3)``, plus ``("author_books", 3)`` for an author's listing;
+    invalidating a tag drops every representation of it across API versions.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._tags = {}  # tag -> set of keys
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value, tags, generation=None):
+        with self._lock:
+            # Built from data that was invalidated while it was being loaded
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + self.ttl, tags, value)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def invalidate(self, *tags):
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def _remove(self, key):
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+response_cache = VersionedResponseCache()
+
+# Conservative bound on bound parameters per statement (SQLITE_MAX_VARIABLE_NUMBER
+# is 999 on older SQLite builds), and rows written per transaction in a batch.
+SQLITE_MAX_VARIABLES = 999
+BATCH_TRANSACTION_SIZE = 5000
+
 class LibraryService:
+    def _books_with_authors(self):
+        # Select the author columns alongside each book so that reading
+        # book.author never issues a per-row Author query.
+        return Book.select(Book, Author).join(Author)
+
     def create_book(self, data):
         author, _ = Author.get_or_create(name=data["author_name"])
         book = Book.create(title=data["title"], author=author)
+        response_cache.invalidate(("book", book.id), ("author_books", author.id))
         return book
 
+    def _author_ids(self, names):
+        ids = {}
+        for names_chunk in chunked(names, SQLITE_MAX_VARIABLES):
+            query = Author.select(Author.id, Author.name).where(Author.name.in_(names_chunk))
+            ids.update((name, author_id) for author_id, name in query.tuples())
+        return ids
+
+    def create_books(self, items):
+        """Create many books at once, resolving and creating authors in bulk.
+
+        Returns ``(books_created, authors_created)``.
+        """
+        names = list({item["author_name"] for item in items})
+        author_ids = self._author_ids(names)
+        missing = [name for name in names if name not in author_ids]
+        if missing:
+            with db.atomic():
+                for names_chunk in chunked(missing, SQLITE_MAX_VARIABLES):
+                    Author.insert_many([(name,) for name in names_chunk], fields=[Author.name]) \
+                        .on_conflict_ignore().execute()
+            author_ids.update(self._author_ids(missing))
+
+        rows = [(item["title"], author_ids[item["author_name"]], True) for item in items]
+        fields = [Book.title, Book.author, Book.available]
+        rows_per_statement = SQLITE_MAX_VARIABLES // len(fields)
+        for transaction_rows in chunked(rows, BATCH_TRANSACTION_SIZE):
+            with db.atomic():
+                for statement_rows in chunked(transaction_rows, rows_per_statement):
+                    Book.insert_many(statement_rows, fields=fields).execute()
+        response_cache.invalidate(*(("author_books", author_ids[name]) for name in names))
+        return len(rows), len(missing)
+
     def get_book_by_id(self, book_id):
-        return Book.get_or_none(Book.id == book_id)
+        return self._books_with_authors().where(Book.id == book_id).get_or_none()
 
-    def get_books_by_author(self, author_id):
+    def get_books_by_author(self, author_id, after_id=None, limit=None):
         author = Author.get_or_none(Author.id == author_id)
         if author is None:
             return None
-        return author.books
+        query = self._books_with_authors().where(Book.author == author)
+        if after_id is not None:
+            query = query.where(Book.id > after_id)
+        query = query.order_by(Book.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
 
 app = APIFlask(__name__, docs_ui='elements',  title="Library API")
 library_service = LibraryService()
@@ -65,60 +241,203 @@ class BookV2SimpleSchema(Schema):
 
 class BookV2DetailedSchema(Schema):
     id = fields.Integer(dump_only=True)
-    full_title = fields.String(dump_only=True)
+    full_title = fields.Method("get_full_title", dump_only=True)
     author = fields.Nested(AuthorSchema)
     is_available = fields.Boolean(attribute="available")
 
+    def get_full_title(self, book):
+        return f"{book.title} by {book.author.name}"
+
+BOOK_SCHEMAS = {
+    ("v1", False): BookV1Schema,
+    ("v2", False): BookV2SimpleSchema,
+    ("v2", True): BookV2DetailedSchema,
+}
+
+@lru_cache(maxsize=None)
+def get_book_schema(version, detailed=False, many=False):
+    """Shared schema instance for a (version, detail level, many) combination."""
+    return BOOK_SCHEMAS[(version, detailed)](many=many)
+
+# Fast-path serializers: plain dict builders producing exactly what the schema
+# of the same key dumps, without marshmallow's per-field dispatch. Used on the
+# list endpoints; bench_serializers.py compares the two paths.
+def _dump_book_v1(book):
+    return {"id": book.id, "title": book.title, "author": book.author.name}
+
+def _dump_book_v2_simple(book):
+    return {"id": book.id, "title": book.title, "author": book.author.name, "is_available": book.available}
+
+def _dump_book_v2_detailed(book):
+    author = book.author
+    return {
+        "id": book.id,
+        "full_title": f"{book.title} by {author.name}",
+        "author": {"id": author.id, "name": author.name},
+        "is_available": book.available,
+    }
+
+BOOK_SERIALIZERS = {
+    ("v1", False): _dump_book_v1,
+    ("v2", False): _dump_book_v2_simple,
+    ("v2", True): _dump_book_v2_detailed,
+}
+
+def serialize_books(books, version, detailed=False):
+    dump = BOOK_SERIALIZERS[(version, detailed)]
+    return [dump(book) for book in books]
+
+def book_tags(book):
+    return (("book", book.id), ("author", book.author_id))
+
+def cache_key(version, route, resource_id, show_details=False):
+    params = tuple(sorted((k, v) for k, v in request.args.items(multi=True) if k != "details"))
+    return (version, route, resource_id, params, show_details)
+
+def cached_json(key, build):
+    """Serve a JSON response from the cache, building it on a miss.
+
+    ``build()`` returns ``(data, headers, tags)``; errors it raises (e.g. 404
+    aborts) are not cached.
+    """
+    entry = response_cache.get(key)
+    status = "HIT"
+    if entry is None:
+        status = "MISS"
+        generation = response_cache.generation
+        data, headers, tags = build()
+        entry = (data, headers)
+        response_cache.set(key, entry, tags, generation)
+    data, headers = entry
+    response = jsonify(data)
+    response.headers.update(headers)
+    response.headers["X-Cache"] = status
+    return response
+
 class BookCreateSchema(Schema):
     title = fields.String(required=True)
     author_name = fields.String(required=True)
 
+class BookBatchSchema(Schema):
+    books = fields.List(fields.Nested(BookCreateSchema), required=True)
+
+class BookBatchResultSchema(Schema):
+    created = fields.Integer()
+    authors_created = fields.Integer()
+
 bp_v1 = Blueprint("api_v1", __name__, url_prefix="/v1")
 
 @bp_v1.get("/books/<int:book_id>")
 @app.output(BookV1Schema)
 def get_book_v1(book_id):
-    book = library_service.get_book_by_id(book_id)
-    if book is None:
-        abort(404, message=f"Book with id {book_id} not found")
-    return book
+    def build():
+        book = library_service.get_book_by_id(book_id)
+        if book is None:
+            abort(404, message=f"Book with id {book_id} not found")
+        return BOOK_SERIALIZERS[("v1", False)](book), {}, book_tags(book)
+
+    return cached_json(cache_key("v1", "book", book_id), build)
 
 bp_v2 = Blueprint("api_v2", __name__, url_prefix="/v2")
 
+AUTHOR_BOOKS_PAGE_SIZE = 100
+AUTHOR_BOOKS_MAX_PAGE_SIZE = 1000
+
+def encode_cursor(last_id):
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))["id"]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(last_id, int):
+        raise ValueError("Invalid cursor")
+    return last_id
+
+def parse_page_args():
+    limit = request.args.get("limit", AUTHOR_BOOKS_PAGE_SIZE, type=int)
+    if limit < 1:
+        abort(400, message="limit must be a positive integer")
+    limit = min(limit, AUTHOR_BOOKS_MAX_PAGE_SIZE)
+    after = request.args.get("after")
+    if not after:
+        return limit, None
+    try:
+        return limit, decode_cursor(after)
+    except ValueError:
+        abort(400, message="Invalid cursor")
+
 @bp_v2.get("/books/<int:book_id>")
 @app.output(BookV2DetailedSchema)
 def get_book_v2(book_id):
-    book = library_service.get_book_by_id(book_id)
-    if book is None:
-        abort(404, message=f"Book with id {book_id} not found")
-
     show_details = request.args.get('details', 'false').lower() == 'true'
 
-    if show_details:
-        schema = BookV2DetailedSchema()
-        book.full_title = f"{book.title} by {book.author.name}"
-    else:
-        schema = BookV2SimpleSchema()
+    def build():
+        book = library_service.get_book_by_id(book_id)
+        if book is None:
+            abort(404, message=f"Book with id {book_id} not found")
+        return get_book_schema("v2", show_details).dump(book), {}, book_tags(book)
 
-    return schema.dump(book)
+    # Already serialized for the requested detail level; returning a Response
+    # keeps @app.output from dumping it a second time.
+    return cached_json(cache_key("v2", "book", book_id, show_details), build)
 
 @bp_v2.get("/authors/<int:author_id>/books")
 @app.output(BookV2DetailedSchema(many=True))
 def get_author_books(author_id):
+    # Cursor-paginated: the next page is advertised in X-Next-Cursor and a
+    # Link rel="next" header so the body stays a plain list of books.
+    limit, after_id = parse_page_args()
+    show_details = request.args.get('details', 'false').lower() == 'true'
+
+    def build():
+        books = library_service.get_books_by_author(author_id, after_id=after_id, limit=limit + 1)
+        if books is None:
+            abort(404, message=f"Author with id {author_id} not found")
+        books = list(books)
+        has_more = len(books) > limit
+        books = books[:limit]
+
+        headers = {}
+        if has_more:
+            cursor = encode_cursor(books[-1].id)
+            next_args = {"after": cursor, "limit": limit}
+            if show_details:
+                next_args["details"] = "true"
+            next_url = url_for("api_v2.get_author_books", author_id=author_id, **next_args)
+            headers["X-Next-Cursor"] = cursor
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        tags = [("author", author_id), ("author_books", author_id)] + [("book", book.id) for book in books]
+        return serialize_books(books, "v2", show_details), headers, tags
+
+    return cached_json(cache_key("v2", "author_books", author_id, show_details), build)
+
+@bp_v2.get("/authors/<int:author_id>/books/stream")
+def stream_author_books(author_id):
+    # NDJSON variant for full dumps: rows come from an unbuffered peewee
+    # iterator and are serialized one at a time as the response is written.
     books = library_service.get_books_by_author(author_id)
     if books is None:
         abort(404, message=f"Author with id {author_id} not found")
 
     show_details = request.args.get('details', 'false').lower() == 'true'
-    
-    if show_details:
-        schema = BookV2DetailedSchema(many=True)
-        for book in books:
-            book.full_title = f"{book.title} by {book.author.name}"
-    else:
-        schema = BookV2SimpleSchema(many=True)
-        
-    return schema.dump(books)
+    dump = BOOK_SERIALIZERS[("v2", show_details)]
+
+    def generate():
+        for book in books.iterator():
+            yield json.dumps(dump(book)) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+@bp_v2.post("/books:batch")
+@app.input(BookBatchSchema)
+@app.output(BookBatchResultSchema, status_code=201)
+def add_books_batch(json_data):
+    created, authors_created = library_service.create_books(json_data["books"])
+    return {"created": created, "authors_created": authors_created}
 
 @app.post("/books")
 @app.input(BookCreateSchema)
@@ -127,6 +446,10 @@ def add_book(json_data):
     book = library_service.create_book(json_data)
     return book
 
+@app.get("/debug/cache")
+def cache_stats():
+    return response_cache.stats()
+
 app.register_blueprint(bp_v1)
 app.register_blueprint(bp_v2)
 
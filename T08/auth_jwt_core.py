@@ -1,22 +1,39 @@
+import multiprocessing
 import os
 from functools import wraps
 from apiflask import APIFlask, Schema, abort
 from apiflask.fields import Integer, String
 from apiflask.validators import Length, Email
-from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt_identity, get_jwt
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
+from werkzeug.security import generate_password_hash
+from werkzeug.serving import is_running_from_reloader
+from password_hasher import HasherBusy, PasswordHasher
+from token_cache import CachingJWTManager, VerifiedTokenCache
+from token_store import create_token_store
+from user_repository import DuplicateUserError, create_user_repository
 
 app = APIFlask(__name__, title="Python Auth")
 app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET", "key")
-jwt = JWTManager(app)
-
-db = {
-    "users": {
-        1: {"id": 1, "email": "admin@example.com", "username": "admin", "password": generate_password_hash("admin123"), "role": "admin"},
-        2: {"id": 2, "email": "user@example.com", "username": "user", "password": generate_password_hash("user123"), "role": "user"},
-    }
-}
-next_user_id = 3
+app.config["JWT_VERIFIED_CACHE_SIZE"] = int(os.environ.get("JWT_VERIFIED_CACHE_SIZE", 10000))
+# Verified tokens are cached until they expire, so repeat calls skip the signature check
+jwt = CachingJWTManager(app, token_cache=VerifiedTokenCache(app.config["JWT_VERIFIED_CACHE_SIZE"]))
+
+app.config["USER_STORE"] = os.environ.get("USER_STORE", "memory")  # or sqlite:///users.db
+app.config["PASSWORD_HASH_METHOD"] = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")  # e.g. pbkdf2:sha256:600000
+app.config["PASSWORD_HASH_WORKERS"] = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+app.config["PASSWORD_HASH_MAX_QUEUE"] = int(os.environ.get("PASSWORD_HASH_MAX_QUEUE", 64))
+hasher = PasswordHasher(
+    method=app.config["PASSWORD_HASH_METHOD"],
+    workers=app.config["PASSWORD_HASH_WORKERS"],
+    max_queue=app.config["PASSWORD_HASH_MAX_QUEUE"],
+)
+users = create_user_repository(app.config["USER_STORE"])
+app.config["TOKEN_STORE"] = os.environ.get("TOKEN_STORE", "memory")  # or sqlite:///revoked.db
+revoked_tokens = create_token_store(app.config["TOKEN_STORE"])
+# Hash workers re-import the __main__ script; only the main process seeds
+if multiprocessing.parent_process() is None and users.count() == 0:
+    users.create("admin@example.com", "admin", generate_password_hash("admin123", method=hasher.method), role="admin")
+    users.create("user@example.com", "user", generate_password_hash("user123", method=hasher.method))
 
 class UserSchema(Schema):
     id = Integer(dump_only=True)
@@ -40,6 +57,17 @@ class SignUpSchema(UserSchema):
 class TokenSchema(Schema):
     token = String()
 
+def hash_or_503(fn, *args):
+    """Run a hasher call, shedding load with 503 when its queue is full."""
+    try:
+        return fn(*args)
+    except HasherBusy:
+        abort(503, "Server is busy, please retry shortly.", headers={"Retry-After": "1"})
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return revoked_tokens.is_revoked(jwt_payload["jti"])
+
 def admin_required():
     def wrapper(fn):
         @wraps(fn)
@@ -59,43 +87,48 @@ def login(json_data):
     email = json_data.get("email")
     password = json_data.get("password")
 
-    user = next((u for u in db["users"].values() if u["email"] == email), None)
+    user = users.get_by_email(email)
 
-    if not user or not check_password_hash(user["password"], password):
+    if not user or not hash_or_503(hasher.verify, user["password"], password):
         abort(401, "Invalid email or password.")
+    if hasher.needs_rehash(user["password"]):
+        # Hash parameters changed since this password was stored: upgrade it now.
+        # Best effort only; when the hasher is busy the upgrade waits for a later login.
+        try:
+            users.update_password(user["id"], hasher.hash(password))
+        except HasherBusy:
+            pass
     
     additional_claims = {"role": user["role"]}
-    token = create_access_token(identity=user["id"], additional_claims=additional_claims)
+    token = create_access_token(identity=str(user["id"]), additional_claims=additional_claims)
     return {"token": token}
 
 @app.post("/api/auth/logout")
 @jwt_required()
 def logout():
-    return {"message": "Successfully logged out. Please delete your token."}
+    claims = get_jwt()
+    # Revoked until it would have expired anyway
+    revoked_tokens.revoke(claims["jti"], claims.get("exp", float("inf")))
+    return {"message": "Successfully logged out."}
 
 
 @app.post("/api/users")
 @app.input(SignUpSchema)
 @app.output(SafeUserResponseSchema, status_code=201)
 def create_user(json_data):
-    global next_user_id
     email = json_data.get("email")
     username = json_data.get("username")
 
-    if any(u["email"] == email for u in db["users"].values()):
+    # Cheap indexed checks first, so a duplicate signup never costs a hash
+    if users.get_by_email(email):
         abort(409, "A user with this email already exists.")
-    if any(u["username"] == username for u in db["users"].values()):
+    if users.get_by_username(username):
         abort(409, "A user with this username already exists.")
 
-    new_user = {
-        "id": next_user_id,
-        "email": email,
-        "username": username,
-        "password": generate_password_hash(json_data["password"]),
-        "role": "user"
-    }
-    db["users"][next_user_id] = new_user
-    next_user_id += 1
+    try:
+        new_user = users.create(email, username, hash_or_503(hasher.hash, json_data["password"]))
+    except DuplicateUserError as e:
+        abort(409, str(e))
     return new_user
 
 
@@ -103,8 +136,8 @@ def create_user(json_data):
 @app.output(SafeUserResponseSchema)
 @jwt_required()
 def get_current_user():
-    current_user_id = get_jwt_identity()
-    user = db["users"].get(current_user_id)
+    current_user_id = int(get_jwt_identity())
+    user = users.get(current_user_id)
     if not user:
         abort(404, "User not found.")
     return user
@@ -113,19 +146,19 @@ def get_current_user():
 @app.output(SafeUserResponseSchema(many=True))
 @admin_required()
 def get_all_users():
-    return list(db["users"].values())
+    return users.list()
 
 @app.get("/api/users/<int:user_id>")
 @app.output(SafeUserResponseSchema)
 @jwt_required()
 def get_user_by_id(user_id: int):
-    current_user_id = get_jwt_identity()
+    current_user_id = int(get_jwt_identity())
     current_user_role = get_jwt().get("role")
 
     if current_user_role != "admin" and current_user_id != user_id:
         abort(403, "Forbidden: You can only view your own profile.")
     
-    user = db["users"].get(user_id)
+    user = users.get(user_id)
     if not user:
         abort(404, "User not found.")
     return user
@@ -133,18 +166,33 @@ def get_user_by_id(user_id: int):
 @app.delete("/api/users/<int:user_id>")
 @jwt_required()
 def delete_user(user_id: int):
-    current_user_id = get_jwt_identity()
+    current_user_id = int(get_jwt_identity())
     current_user_role = get_jwt().get("role")
 
     if current_user_role != "admin" and current_user_id != user_id:
         abort(403, "Forbidden: You can only delete your own account.")
 
-    if user_id not in db["users"]:
+    if not users.delete(user_id):
         abort(404, "User not found.")
-
-    del db["users"][user_id]
     return {"message": f"User with ID {user_id} successfully deleted."}
 
+@app.get("/api/metrics/hashing")
+@admin_required()
+def hashing_metrics():
+    return hasher.metrics()
+
+@app.get("/api/metrics/token-cache")
+@admin_required()
+def token_cache_metrics():
+    return jwt.token_cache.stats()
+
+@app.get("/api/metrics/token-store")
+@admin_required()
+def token_store_metrics():
+    return revoked_tokens.stats()
 
 if __name__ == '__main__':
+    # With the reloader on, only the serving child needs warm hash workers
+    if is_running_from_reloader():
+        hasher.warm_up()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""Load test for the T08 auth apps: latency percentiles, throughput, baselines.
+
+Drives login, refresh (refresh app only), /api/users/me and the admin user
+listing through the Flask test client from a pool of worker threads, then
+reports p50/p95/p99 latency and throughput per scenario. Results can be
+saved as a baseline and later runs are checked against it, exiting non-zero
+when a scenario regresses beyond the tolerance.
+
+    python bench_auth.py [--app core|refresh] [--requests 200] [--concurrency 8]
+                         [--users 1000] [--baseline bench_auth_baseline.json]
+                         [--save-baseline] [--tolerance 0.25]
+
+App settings (PASSWORD_HASH_METHOD, USER_STORE, TOKEN_STORE, ...) are read
+from the environment as usual, so hashing cost or storage backends can be
+compared by re-running with different variables.
+"""
+import argparse
+import importlib
+import json
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+APPS = {"core": "auth_jwt_core", "refresh": "auth_jwt_refresh"}
+ADMIN = {"email": "admin@example.com", "password": "admin123"}
+USER = {"email": "user@example.com", "password": "user123"}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+class Client:
+    """Per-thread test client that keeps its own tokens."""
+
+    def __init__(self, app):
+        self.http = app.test_client()
+        self.access_token = None
+        self.refresh_token = None
+
+    def login(self, credentials=USER):
+        response = self.http.post("/api/auth/login", json=credentials)
+        if response.status_code == 200:
+            body = response.get_json()
+            self.access_token = body.get("access_token") or body.get("token")
+            self.refresh_token = body.get("refresh_token")
+        return response.status_code
+
+    def refresh(self):
+        # Refresh tokens are single-use, so each call continues this client's chain
+        response = self.http.post("/api/auth/refresh", headers=bearer(self.refresh_token))
+        if response.status_code == 200:
+            body = response.get_json()
+            self.access_token = body["access_token"]
+            self.refresh_token = body.get("refresh_token", self.refresh_token)
+        return response.status_code
+
+    def me(self):
+        return self.http.get("/api/users/me", headers=bearer(self.access_token)).status_code
+
+    def admin_list(self):
+        return self.http.get("/api/users", headers=bearer(self.access_token)).status_code
+
+
+SCENARIOS = {
+    # name: (credentials used to prepare the client, operation)
+    "login": (USER, Client.login),
+    "refresh": (USER, Client.refresh),
+    "me": (USER, Client.me),
+    "admin_list": (ADMIN, Client.admin_list),
+}
+
+
+def run_scenario(app, name, requests, concurrency):
+    credentials, operation = SCENARIOS[name]
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = Client(app)
+            if local.client.login(credentials) != 200:
+                raise RuntimeError(f"{name}: could not log in as {credentials['email']}")
+        return local.client
+
+    def one_call(_):
+        c = client()
+        started = time.perf_counter()
+        status = operation(c)
+        return time.perf_counter() - started, status
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # Warm up every worker (login, token cache) before the clock starts
+        list(pool.map(lambda _: client(), range(concurrency * 4)))
+        started = time.perf_counter()
+        results = list(pool.map(one_call, range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds * 1000 for seconds, status in results if status == 200)
+    return {
+        "requests": requests,
+        "errors": sum(1 for _, status in results if status != 200),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def seed_users(users, count, method):
+    """Pad the user store so lookups and listings run against a realistic size."""
+    pwhash = generate_password_hash("bench-password", method=method)
+    for i in range(max(count - users.count(), 0)):
+        users.create(f"bench{i}@example.com", f"bench{i}", pwhash)
+
+
+def check_baseline(results, baseline, tolerance):
+    """Return human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for name, current in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if current["errors"] > expected.get("errors", 0):
+            regressions.append(f"{name}: {current['errors']} errors (baseline {expected.get('errors', 0)})")
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if current[key] > expected[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {current[key]} > baseline {expected[key]}")
+        if current["throughput_rps"] < expected["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {current['throughput_rps']} < baseline {expected['throughput_rps']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", choices=APPS, default="refresh", help="which auth app to load")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="worker threads")
+    parser.add_argument("--users", type=int, default=1000, help="pad the user store to this many users")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenarios to run")
+    parser.add_argument("--baseline", default=os.path.join(os.path.dirname(__file__), "bench_auth_baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    module = importlib.import_module(APPS[args.app])
+    seed_users(module.users, args.users, module.hasher.method)
+    # Start the hash workers up front so process start-up is not measured as login latency
+    module.hasher.warm_up()
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    if args.app == "core" and "refresh" in scenarios:
+        scenarios.remove("refresh")
+
+    results = {}
+    print(f"{'scenario':<12}{'errors':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    try:
+        for name in scenarios:
+            r = results[name] = run_scenario(module.app, name, args.requests, args.concurrency)
+            print(f"{name:<12}{r['errors']:>7}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+                  f"{r['p99_ms']:>10.2f}{r['throughput_rps']:>10.1f}")
+    finally:
+        module.hasher.shutdown()
+
+    # Baselines are kept per app and per hashing method, since either changes the numbers
+    key = f"{args.app}/{module.hasher.parameters}/c{args.concurrency}"
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+    if args.save_baseline:
+        stored[key] = results
+        with open(args.baseline, "w") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline} under {key!r}")
+        return
+    if key not in stored:
+        print(f"No baseline for {key!r}; run with --save-baseline to record one")
+        return
+    regressions = check_baseline(results, stored[key], args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        raise SystemExit(1)
+    print(f"Within {args.tolerance:.0%} of baseline {key!r}")
+
+
+if __name__ == "__main__":
+    main()
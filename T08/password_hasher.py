@@ -0,0 +1,198 @@
+"""Password hashing off the request thread.
+
+Hashes are computed in a process pool so CPU-bound work is not serialized
+by the GIL. Admission is bounded: once every worker is busy and
+``max_queue`` more requests are waiting, new requests fail fast with
+HasherBusy instead of piling up behind the queue. A timed-out call or a
+crashed worker also surfaces as HasherBusy; a broken pool is replaced on
+the next call.
+
+Workers start from forkserver/spawn, which re-imports the ``__main__``
+script in every worker. When an app is started as ``python app.py`` its
+module-level setup therefore runs once per worker; ``warm_up()`` pays that
+cost at startup rather than on the first logins.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from functools import cached_property
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+
+def _timed_generate(password, method, salt_length):
+    started = time.time()
+    result = generate_password_hash(password, method=method, salt_length=salt_length)
+    return result, started, time.time()
+
+
+def _noop():
+    return None
+
+
+def _timed_check(pwhash, password):
+    started = time.time()
+    result = check_password_hash(pwhash, password)
+    return result, started, time.time()
+
+
+class _Timing:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def report(self):
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class PasswordHasher:
+    """Bounded hashing executor with configurable algorithm and cost.
+
+    ``method`` is any werkzeug method string, e.g. ``scrypt`` or
+    ``pbkdf2:sha256:600000``. With ``workers=0`` hashing runs inline on the
+    calling thread (still subject to the queue limit).
+    """
+
+    def __init__(self, method="scrypt", workers=None, max_queue=64, salt_length=16, timeout=30.0):
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(self.workers, 1) + max_queue)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._latency = _Timing()
+        self._queue_wait = _Timing()
+        self.rejected = 0
+        self.timeouts = 0
+        self.pool_restarts = 0
+        self.in_flight = 0
+
+    @cached_property
+    def parameters(self):
+        # As werkzeug writes them into the hash, e.g. "scrypt:32768:8:1". Computed
+        # on first use so merely importing an app (e.g. in a worker) costs no hash.
+        return generate_password_hash("", method=self.method, salt_length=1).split("$", 1)[0]
+
+    def warm_up(self):
+        """Start every worker now so process start-up never lands on a request."""
+        self.parameters  # also pay for the parameter probe up front
+        if self.workers == 0:
+            return
+        pool = self._executor()
+        for future in [pool.submit(_noop) for _ in range(self.workers)]:
+            future.result()
+
+    def _executor(self):
+        # Created on first use so importing the app never spawns processes.
+        # That first use happens inside a threaded server, where forking is
+        # unsafe, so workers come from a forkserver (or spawn) instead.
+        with self._pool_lock:
+            if self._pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._pool
+
+    def _discard_pool(self, pool):
+        with self._pool_lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        with self._metrics_lock:
+            self.pool_restarts += 1
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, _future=None):
+        self._slots.release()
+        with self._metrics_lock:
+            self.in_flight -= 1
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._metrics_lock:
+                self.rejected += 1
+            raise HasherBusy()
+        with self._metrics_lock:
+            self.in_flight += 1
+        submitted = time.time()
+        if self.workers == 0:
+            try:
+                result, started, finished = fn(*args)
+            finally:
+                self._release()
+        else:
+            pool = self._executor()
+            try:
+                future = pool.submit(fn, *args)
+            except BrokenProcessPool:
+                self._release()
+                self._discard_pool(pool)
+                raise HasherBusy()
+            # The slot is held until the job really finishes, even if we stop
+            # waiting for it, so workers + max_queue stays a hard limit
+            future.add_done_callback(self._release)
+            try:
+                result, started, finished = future.result(timeout=self.timeout)
+            except FutureTimeout:
+                with self._metrics_lock:
+                    self.timeouts += 1
+                raise HasherBusy()
+            except BrokenProcessPool:
+                # A worker died (OOM kill, segfault); replace the pool next call
+                self._discard_pool(pool)
+                raise HasherBusy()
+        with self._metrics_lock:
+            self._queue_wait.add(max(started - submitted, 0.0))
+            self._latency.add(finished - started)
+        return result
+
+    def hash(self, password):
+        return self._run(_timed_generate, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        return self._run(_timed_check, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True if ``pwhash`` was made with a different algorithm or cost."""
+        return pwhash.split("$", 1)[0] != self.parameters
+
+    def metrics(self):
+        parameters = self.parameters  # may compute the probe hash; keep it outside the lock
+        with self._metrics_lock:
+            return {
+                "method": parameters,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "pool_restarts": self.pool_restarts,
+                "hash_latency": self._latency.report(),
+                "queue_wait": self._queue_wait.report(),
+            }
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
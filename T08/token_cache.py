@@ -0,0 +1,91 @@
+"""Cache of already-verified JWTs.
+
+Clients reuse the same access token for many calls; once its signature and
+claims have been verified, later requests carrying the identical token can
+skip the decode and signature check until the token expires.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask_jwt_extended import JWTManager
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of sha256(token) -> verified claims that honours ``exp``."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # digest -> (expires_at or None, claims)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        key = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, claims = entry
+            if expires_at is not None and time.time() >= expires_at:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, token, claims):
+        key = self._digest(token)
+        with self._lock:
+            self._entries[key] = (claims.get("exp"), claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop everything, e.g. after rotating the signing key."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+            }
+
+
+class CachingJWTManager(JWTManager):
+    """JWTManager that consults a VerifiedTokenCache before verifying a token.
+
+    Only the plain decode path is cached: requests that need a CSRF check or
+    that accept expired tokens always go through full verification. Blocklist
+    and user-loader callbacks still run on every request, after decoding.
+    """
+
+    def __init__(self, app=None, token_cache=None, **kwargs):
+        self.token_cache = token_cache or VerifiedTokenCache()
+        super().__init__(app, **kwargs)
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        if csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        claims = self.token_cache.get(encoded_token)
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+            self.token_cache.put(encoded_token, claims)
+        # Callers get their own copy so the cached claims cannot be mutated
+        return dict(claims)
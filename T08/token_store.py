@@ -0,0 +1,122 @@
+"""Revoked-token store for the T08 auth services, keyed by JWT ``jti``.
+
+Each revocation lives only until the token it names would have expired
+anyway, so the store never grows beyond the set of still-valid revoked
+tokens. ``is_revoked`` runs on every protected request and is a single
+hash (or primary-key) lookup.
+"""
+import heapq
+import sqlite3
+import threading
+import time
+
+
+class TokenStore:
+    """Interface shared by the revocation store backends."""
+
+    def revoke(self, jti, expires_at):
+        """Revoke ``jti`` until ``expires_at`` (Unix time).
+
+        Returns False if it was already revoked, which lets callers treat
+        single-use tokens (refresh rotation) atomically.
+        """
+        raise NotImplementedError
+
+    def is_revoked(self, jti):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+
+class InMemoryTokenStore(TokenStore):
+    """Dict of jti -> expiry, compacted through a min-heap of expiry times."""
+
+    def __init__(self):
+        self._revoked = {}
+        self._expiry_heap = []
+        self._lock = threading.Lock()
+
+    def _compact(self, now):
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, jti = heapq.heappop(heap)
+            if self._revoked.get(jti) == expires_at:
+                del self._revoked[jti]
+
+    def revoke(self, jti, expires_at):
+        now = time.time()
+        with self._lock:
+            self._compact(now)
+            current = self._revoked.get(jti)
+            if current is not None and current > now:
+                return False
+            self._revoked[jti] = expires_at
+            heapq.heappush(self._expiry_heap, (expires_at, jti))
+            return True
+
+    def is_revoked(self, jti):
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def stats(self):
+        with self._lock:
+            self._compact(time.time())
+            return {"backend": "memory", "revoked": len(self._revoked)}
+
+
+class SqliteTokenStore(TokenStore):
+    """SQLite table keyed by jti; expired rows are purged every few revocations."""
+
+    PURGE_EVERY = 100
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._revocations = 0
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS revoked_tokens (
+                jti TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL) WITHOUT ROWID""")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires ON revoked_tokens(expires_at)"
+            )
+
+    def revoke(self, jti, expires_at):
+        now = time.time()
+        with self._lock, self._conn:
+            self._revocations += 1
+            if self._revocations % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM revoked_tokens WHERE expires_at <= ?", (now,))
+            # Replace only a lapsed entry; a live one means already revoked
+            cur = self._conn.execute(
+                "INSERT INTO revoked_tokens (jti, expires_at) VALUES (?, ?) "
+                "ON CONFLICT(jti) DO UPDATE SET expires_at = excluded.expires_at "
+                "WHERE revoked_tokens.expires_at <= ?",
+                (jti, expires_at, now),
+            )
+            return cur.rowcount > 0
+
+    def is_revoked(self, jti):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM revoked_tokens WHERE jti = ? AND expires_at > ?", (jti, time.time())
+            ).fetchone()
+        return row is not None
+
+    def stats(self):
+        with self._lock:
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM revoked_tokens WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+        return {"backend": "sqlite", "revoked": count}
+
+
+def create_token_store(url):
+    """Build a store from a URL: ``memory`` or ``sqlite:///path.db``."""
+    if url == "memory":
+        return InMemoryTokenStore()
+    if url.startswith("sqlite:///"):
+        return SqliteTokenStore(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported token store: {url}")
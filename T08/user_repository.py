@@ -0,0 +1,181 @@
+"""User storage for the T08 auth services.
+
+Both backends index users by id and keep unique indexes on the
+case-normalized email and username, so login and signup checks are O(1)
+instead of scanning every account.
+"""
+import sqlite3
+import threading
+
+
+class DuplicateUserError(Exception):
+    """Raised when an email or username is already taken."""
+
+    def __init__(self, field):
+        super().__init__(f"A user with this {field} already exists.")
+        self.field = field
+
+
+def normalize(value):
+    return value.strip().casefold()
+
+
+class UserRepository:
+    """Interface shared by the user store backends."""
+
+    def get(self, user_id):
+        raise NotImplementedError
+
+    def get_by_email(self, email):
+        raise NotImplementedError
+
+    def get_by_username(self, username):
+        raise NotImplementedError
+
+    def create(self, email, username, password_hash, role="user"):
+        """Insert a user atomically, raising DuplicateUserError on a clash."""
+        raise NotImplementedError
+
+    def update_password(self, user_id, password_hash):
+        raise NotImplementedError
+
+    def delete(self, user_id):
+        raise NotImplementedError
+
+    def list(self):
+        raise NotImplementedError
+
+    def count(self):
+        raise NotImplementedError
+
+
+class InMemoryUserRepository(UserRepository):
+    def __init__(self):
+        self._users = {}
+        self._by_email = {}
+        self._by_username = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        return self._users.get(user_id)
+
+    def get_by_email(self, email):
+        user_id = self._by_email.get(normalize(email))
+        return None if user_id is None else self._users.get(user_id)
+
+    def get_by_username(self, username):
+        user_id = self._by_username.get(normalize(username))
+        return None if user_id is None else self._users.get(user_id)
+
+    def create(self, email, username, password_hash, role="user"):
+        email_key, username_key = normalize(email), normalize(username)
+        with self._lock:
+            if email_key in self._by_email:
+                raise DuplicateUserError("email")
+            if username_key in self._by_username:
+                raise DuplicateUserError("username")
+            user = {"id": self._next_id, "email": email, "username": username,
+                    "password": password_hash, "role": role}
+            self._users[user["id"]] = user
+            self._by_email[email_key] = user["id"]
+            self._by_username[username_key] = user["id"]
+            self._next_id += 1
+            return user
+
+    def update_password(self, user_id, password_hash):
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is not None:
+                user["password"] = password_hash
+
+    def delete(self, user_id):
+        with self._lock:
+            user = self._users.pop(user_id, None)
+            if user is None:
+                return False
+            del self._by_email[normalize(user["email"])]
+            del self._by_username[normalize(user["username"])]
+            return True
+
+    def list(self):
+        return list(self._users.values())
+
+    def count(self):
+        return len(self._users)
+
+
+class SqliteUserRepository(UserRepository):
+    """SQLite-backed store; uniqueness is enforced by UNIQUE indexes."""
+
+    COLUMNS = "id, email, username, password, role"
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT NOT NULL,
+                email_key TEXT NOT NULL UNIQUE,
+                username TEXT NOT NULL,
+                username_key TEXT NOT NULL UNIQUE,
+                password TEXT NOT NULL,
+                role TEXT NOT NULL)""")
+
+    def _fetch_one(self, where, value):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self.COLUMNS} FROM users WHERE {where} = ?", (value,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get(self, user_id):
+        return self._fetch_one("id", user_id)
+
+    def get_by_email(self, email):
+        return self._fetch_one("email_key", normalize(email))
+
+    def get_by_username(self, username):
+        return self._fetch_one("username_key", normalize(username))
+
+    def create(self, email, username, password_hash, role="user"):
+        try:
+            with self._lock, self._conn:
+                cur = self._conn.execute(
+                    "INSERT INTO users (email, email_key, username, username_key, password, role) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (email, normalize(email), username, normalize(username), password_hash, role),
+                )
+        except sqlite3.IntegrityError as exc:
+            raise DuplicateUserError("email" if "email_key" in str(exc) else "username") from exc
+        return {"id": cur.lastrowid, "email": email, "username": username,
+                "password": password_hash, "role": role}
+
+    def update_password(self, user_id, password_hash):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE users SET password = ? WHERE id = ?", (password_hash, user_id))
+
+    def delete(self, user_id):
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM users WHERE id = ?", (user_id,)).rowcount > 0
+
+    def list(self):
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {self.COLUMNS} FROM users ORDER BY id").fetchall()
+        return [dict(r) for r in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+def create_user_repository(url):
+    """Build a repository from a store URL: ``memory`` or ``sqlite:///path.db``."""
+    if url == "memory":
+        return InMemoryUserRepository()
+    if url.startswith("sqlite:///"):
+        return SqliteUserRepository(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported user store: {url}")
@@ -1,5 +1,5 @@
 import logging
-import uuid
+import os
 from typing import List
 
 from apiflask import APIFlask, Schema, abort, pagination
@@ -8,6 +8,8 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from prometheus_flask_exporter import PrometheusMetrics
 
+from product_store import create_product_store
+
 # --- 1. Cấu hình Logging ---
 logging.basicConfig(
     level=logging.INFO,
@@ -28,7 +30,10 @@ limiter = Limiter(
 )
 
 # --- 3. Database giả lập (In-memory) ---
-products_db = []
+# Kho theo id (O(1) get/update/delete), an toàn đa luồng.
+# PRODUCT_STORAGE: dict (mặc định, có index) | slots | columnar (tiết kiệm bộ nhớ)
+app.config["PRODUCT_STORAGE"] = os.environ.get("PRODUCT_STORAGE", "dict")
+products_db = create_product_store(app.config["PRODUCT_STORAGE"])
 
 # --- 4. Định nghĩa Schemas (Data Models) ---
 
@@ -94,27 +99,14 @@ def get_products(query_data):
 
     logger.info(f"Querying products: page={page}, filter_name={name_filter}")
 
-    # Bước 1: Filtering (Lọc dữ liệu)
-    filtered_products = products_db
-
-    if name_filter:
-        filtered_products = [
-            p for p in filtered_products 
-            if name_filter.lower() in p["name"].lower()
-        ]
-    
-    if min_price is not None:
-        filtered_products = [p for p in filtered_products if p["price"] >= min_price]
-        
-    if max_price is not None:
-        filtered_products = [p for p in filtered_products if p["price"] <= max_price]
-
-    # Bước 2: Pagination (Cắt dữ liệu theo trang)
-    total = len(filtered_products)
-    start = (page - 1) * per_page
-    end = start + per_page
-    
-    paginated_items = filtered_products[start:end]
+    # Bước 1 + 2: Filtering & Pagination qua index (không tạo bản sao danh sách)
+    total, paginated_items = products_db.search(
+        name=name_filter,
+        min_price=min_price,
+        max_price=max_price,
+        offset=(page - 1) * per_page,
+        limit=per_page,
+    )
 
     # Bước 3: Trả về kết quả đóng gói
     return {
@@ -129,22 +121,15 @@ def get_products(query_data):
 @app.output(ProductOut, status_code=201)
 @limiter.limit("5 per minute")
 def create_product(data):
-    product_id = str(uuid.uuid4())
-    new_product = {
-        "id": product_id,
-        "name": data["name"],
-        "price": data["price"],
-        "description": data.get("description", "")
-    }
-    products_db.append(new_product)
-    logger.info(f"Product created with ID: {product_id}")
+    new_product = products_db.create(data["name"], data["price"], data.get("description", ""))
+    logger.info(f"Product created with ID: {new_product['id']}")
     return new_product
 
 @app.get("/products/<id>")
 @app.output(ProductOut)
 @limiter.limit("10 per minute")
 def get_product(id):
-    product = next((p for p in products_db if p["id"] == id), None)
+    product = products_db.get(id)
     if not product:
         logger.warning(f"Product not found: {id}")
         abort(404, message="Product not found")
@@ -155,15 +140,11 @@ def get_product(id):
 @app.output(ProductOut)
 @limiter.limit("5 per minute")
 def update_product(id, data):
-    product = next((p for p in products_db if p["id"] == id), None)
+    product = products_db.update(id, data["name"], data["price"], data.get("description", ""))
     if not product:
         logger.warning(f"Attempted update on non-existent product: {id}")
         abort(404, message="Product not found")
     
-    product["name"] = data["name"]
-    product["price"] = data["price"]
-    product["description"] = data.get("description", "")
-    
     logger.info(f"Product updated: {id}")
     return product
 
@@ -171,14 +152,16 @@ def update_product(id, data):
 @app.output(MessageSchema)
 @limiter.limit("5 per minute")
 def delete_product(id):
-    product = next((p for p in products_db if p["id"] == id), None)
-    if not product:
+    if not products_db.delete(id):
         logger.warning(f"Attempted delete on non-existent product: {id}")
         abort(404, message="Product not found")
-    
-    products_db.remove(product)
     logger.info(f"Product deleted: {id}")
     return {"message": "Product deleted"}
 
+# Ước lượng bộ nhớ của kho sản phẩm (bytes / sản phẩm) theo kiểu lưu trữ đang dùng
+@app.get("/debug/memory")
+def debug_memory():
+    return products_db.memory_report()
+
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""Index in-memory cho sản phẩm, phục vụ lọc + phân trang của GET /products.
+
+- Giá: mảng đã sắp xếp, truy vấn khoảng bằng ``bisect`` (O(log n)).
+- Tên: index trigram (3 ký tự, lowercase) -> tập sản phẩm, để tìm chuỗi con
+  mà không phải quét toàn bộ danh sách.
+- Tổng số sản phẩm được đếm sẵn, không cần ``len()`` trên bản sao đã lọc.
+
+Kết quả luôn giữ thứ tự thêm vào (như list ban đầu).
+"""
+import heapq
+import itertools
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+GRAM_SIZE = 3
+
+
+def name_grams(name):
+    return {name[i:i + GRAM_SIZE] for i in range(len(name) - GRAM_SIZE + 1)}
+
+
+class ProductIndex:
+    def __init__(self):
+        self._seq = itertools.count()
+        self._by_seq = {}                # seq -> product (dict giữ thứ tự thêm vào)
+        self._seq_of = {}                # product id -> seq
+        self._names = {}                 # seq -> tên lowercase
+        self._prices = []                # giá đã sắp xếp
+        self._price_seqs = []            # seq tương ứng với từng phần tử của _prices
+        self._grams = defaultdict(set)   # trigram -> {seq}
+
+    def __len__(self):
+        return len(self._by_seq)
+
+    # --- Cập nhật index ---
+
+    def _index_fields(self, seq, product):
+        name = product["name"].lower()
+        self._names[seq] = name
+        for gram in name_grams(name):
+            self._grams[gram].add(seq)
+        pos = bisect_right(self._prices, product["price"])
+        self._prices.insert(pos, product["price"])
+        self._price_seqs.insert(pos, seq)
+
+    def _unindex_fields(self, seq, price):
+        for gram in name_grams(self._names.pop(seq)):
+            bucket = self._grams[gram]
+            bucket.discard(seq)
+            if not bucket:
+                del self._grams[gram]
+        # Các sản phẩm cùng giá nằm liền nhau, chỉ cần dò trong đoạn đó
+        pos = bisect_left(self._prices, price)
+        while self._price_seqs[pos] != seq:
+            pos += 1
+        del self._prices[pos]
+        del self._price_seqs[pos]
+
+    def add(self, product):
+        seq = next(self._seq)
+        self._by_seq[seq] = product
+        self._seq_of[product["id"]] = seq
+        self._index_fields(seq, product)
+
+    def replace(self, old, new):
+        """Thay ``old`` bằng bản ghi ``new`` cùng id; vị trí trong danh sách giữ nguyên."""
+        seq = self._seq_of[old["id"]]
+        self._unindex_fields(seq, old["price"])
+        self._by_seq[seq] = new
+        self._index_fields(seq, new)
+
+    def remove(self, product_id):
+        seq = self._seq_of.pop(product_id)
+        product = self._by_seq.pop(seq)
+        self._unindex_fields(seq, product["price"])
+
+    # --- Truy vấn ---
+
+    def _name_candidates(self, needle):
+        """Tập seq có thể chứa ``needle``; None nếu needle quá ngắn để dùng index."""
+        grams = name_grams(needle)
+        if not grams:
+            return None
+        buckets = sorted((self._grams.get(g, ()) for g in grams), key=len)
+        if not buckets[0]:
+            return set()
+        return set(buckets[0]).intersection(*buckets[1:])
+
+    def _page_by_seq(self, seqs, offset, limit):
+        # Chỉ giữ offset + limit seq nhỏ nhất (heap), không sắp xếp toàn bộ
+        return [self._by_seq[s] for s in heapq.nsmallest(offset + limit, seqs)[offset:]]
+
+    def _scan(self, matches, offset, limit, count_all):
+        """Quét theo thứ tự thêm vào; dừng khi đủ trang trừ khi cần đếm tổng."""
+        page, total, end = [], 0, offset + limit
+        for seq, product in self._by_seq.items():
+            if not matches(seq, product):
+                continue
+            if offset <= total < end:
+                page.append(product)
+            total += 1
+            if total >= end and not count_all:
+                break
+        return total, page
+
+    def search(self, name=None, min_price=None, max_price=None, offset=0, limit=10):
+        """Trả về (total, products của trang) theo các bộ lọc."""
+        offset, limit = max(offset, 0), max(limit, 0)
+        lo = 0 if min_price is None else bisect_left(self._prices, min_price)
+        hi = len(self._prices) if max_price is None else bisect_right(self._prices, max_price)
+        if lo >= hi:
+            return 0, []
+
+        def in_price(product):
+            return ((min_price is None or product["price"] >= min_price)
+                    and (max_price is None or product["price"] <= max_price))
+
+        if name:
+            needle = name.lower()
+            candidates = self._name_candidates(needle)
+            if candidates is None:
+                # Chuỗi < 3 ký tự: quét một lượt, chỉ đếm chứ không tạo bản sao
+                return self._scan(
+                    lambda s, p: needle in self._names[s] and in_price(p), offset, limit, count_all=True
+                )
+            matched = [s for s in candidates if needle in self._names[s] and in_price(self._by_seq[s])]
+            return len(matched), self._page_by_seq(matched, offset, limit)
+
+        total = hi - lo
+        if total == len(self._prices):
+            return total, list(itertools.islice(self._by_seq.values(), offset, offset + limit))
+        if total * 4 <= len(self._prices):
+            # Khoảng giá hẹp: lấy trang trực tiếp từ đoạn bisect
+            return total, self._page_by_seq(self._price_seqs[lo:hi], offset, limit)
+        # Khoảng giá rộng: quét theo thứ tự, trung bình dừng sau ~4 trang
+        _, page = self._scan(lambda s, p: in_price(p), offset, limit, count_all=False)
+        return total, page
@@ -0,0 +1,265 @@
+"""Kho sản phẩm in-memory theo khóa id.
+
+- ``get``/``update``/``delete`` theo id là O(1) nhờ dict id -> bản ghi.
+- dict giữ thứ tự thêm vào nên thứ tự phân trang không đổi khi xóa.
+- Mọi thao tác ghi (và truy vấn index) chạy dưới một lock, an toàn khi
+  server chạy nhiều thread.
+- Bản ghi không bị sửa tại chỗ: ``update`` thay bằng bản ghi mới, nên response
+  đang được serialize ở thread khác không thấy dữ liệu dở dang.
+
+Có 3 kiểu lưu trữ (chọn bằng ``create_product_store``):
+
+- ``dict``: mỗi sản phẩm là một dict, kèm index giá/tên (nhanh nhất khi lọc).
+- ``slots``: mỗi sản phẩm là object ``__slots__`` (không có dict riêng), vẫn dùng index.
+- ``columnar``: lưu theo cột (giá ``array('d')``, UUID 16 byte, chuỗi được intern),
+  lọc bằng cách quét thẳng trên các cột; tốn ít bộ nhớ nhất, không có index.
+"""
+import sys
+import threading
+import time
+import uuid
+from array import array
+from itertools import compress, islice
+
+from product_index import ProductIndex
+
+# /debug/memory duyệt toàn bộ object (O(n)), nên kết quả được giữ lại một lúc
+MEMORY_REPORT_TTL = 30.0
+
+
+def deep_sizeof(obj, seen=None):
+    """Tổng ``sys.getsizeof`` của obj và mọi thứ nó tham chiếu (đếm mỗi object một lần).
+
+    Mỗi container được chụp lại bằng ``list(...)`` (nguyên tử nhờ GIL) trước khi duyệt,
+    nên có thể chạy song song với các thread đang ghi; khi đó kết quả là ước lượng.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in list(obj.items()))
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in list(obj))
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    for slot in getattr(type(obj), "__slots__", ()):
+        size += deep_sizeof(getattr(obj, slot, None), seen)
+    return size
+
+
+class ProductStore:
+    backend = "dict"
+
+    def __init__(self):
+        self._products = {}  # id -> product
+        self._index = ProductIndex()
+        self._lock = threading.Lock()
+        self._init_memory_report()
+
+    def __len__(self):
+        return len(self._products)
+
+    def _init_memory_report(self):
+        self._report_lock = threading.Lock()
+        self._report = None  # (thời điểm đo, report)
+
+    def _new_record(self, product_id, name, price, description):
+        return {"id": product_id, "name": name, "price": price, "description": description}
+
+    def get(self, product_id):
+        return self._products.get(product_id)
+
+    def create(self, name, price, description=""):
+        product = self._new_record(str(uuid.uuid4()), name, price, description)
+        with self._lock:
+            self._products[product["id"]] = product
+            self._index.add(product)
+        return product
+
+    def update(self, product_id, name, price, description=""):
+        """Trả về bản ghi mới, hoặc None nếu không có sản phẩm."""
+        with self._lock:
+            old = self._products.get(product_id)
+            if old is None:
+                return None
+            product = self._new_record(product_id, name, price, description)
+            self._products[product_id] = product
+            self._index.replace(old, product)
+        return product
+
+    def delete(self, product_id):
+        with self._lock:
+            if self._products.pop(product_id, None) is None:
+                return False
+            self._index.remove(product_id)
+        return True
+
+    def search(self, name=None, min_price=None, max_price=None, offset=0, limit=10):
+        # Index dùng set/list có thể đổi khi đang ghi, nên đọc cũng cần lock
+        with self._lock:
+            return self._index.search(name, min_price, max_price, offset, limit)
+
+    def memory_report(self):
+        # Không giữ self._lock khi duyệt: API sản phẩm vẫn chạy trong lúc đo.
+        # _report_lock chỉ đảm bảo mỗi lúc có một lần đo; các lời gọi khác dùng kết quả cache.
+        with self._report_lock:
+            if self._report is not None and time.monotonic() - self._report[0] < MEMORY_REPORT_TTL:
+                return self._report[1]
+            count = len(self)
+            total = deep_sizeof(self, seen={id(self._report_lock), id(self._report)})
+            report = {
+                "backend": self.backend,
+                "products": count,
+                "bytes": total,
+                "bytes_per_product": round(total / count, 1) if count else 0.0,
+                "measured_at": time.time(),
+            }
+            self._report = (time.monotonic(), report)
+            return report
+
+
+class Product:
+    """Bản ghi sản phẩm không có ``__dict__``; vẫn đọc được kiểu ``product["name"]``."""
+
+    __slots__ = ("id", "name", "price", "description")
+
+    def __init__(self, id, name, price, description):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.description = description
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+class SlotsProductStore(ProductStore):
+    backend = "slots"
+
+    def _new_record(self, product_id, name, price, description):
+        return Product(product_id, sys.intern(name), price, sys.intern(description))
+
+
+class ColumnarProductStore(ProductStore):
+    """Mỗi trường là một cột; hàng bị xóa được đánh dấu rồi dọn theo lô."""
+
+    backend = "columnar"
+    ID_SIZE = 16
+
+    def __init__(self):
+        self._ids = bytearray()    # UUID 16 byte / hàng
+        self._prices = array("d")
+        self._names = []
+        self._name_keys = []       # tên lowercase để lọc
+        self._descriptions = []
+        self._alive = bytearray()  # 1 = còn, 0 = đã xóa
+        self._row_of = {}          # UUID bytes -> hàng
+        self._lock = threading.Lock()
+        self._init_memory_report()
+
+    def __len__(self):
+        return len(self._row_of)
+
+    def _materialize(self, row):
+        start = row * self.ID_SIZE
+        return {
+            "id": str(uuid.UUID(bytes=bytes(self._ids[start:start + self.ID_SIZE]))),
+            "name": self._names[row],
+            "price": self._prices[row],
+            "description": self._descriptions[row],
+        }
+
+    def _key(self, product_id):
+        try:
+            return uuid.UUID(product_id).bytes
+        except ValueError:
+            return None
+
+    def get(self, product_id):
+        with self._lock:
+            row = self._row_of.get(self._key(product_id))
+            return None if row is None else self._materialize(row)
+
+    def create(self, name, price, description=""):
+        key = uuid.uuid4().bytes
+        with self._lock:
+            row = len(self._alive)
+            self._ids += key
+            self._prices.append(price)
+            self._names.append(sys.intern(name))
+            self._name_keys.append(sys.intern(name.lower()))
+            self._descriptions.append(sys.intern(description))
+            self._alive.append(1)
+            self._row_of[key] = row
+            return self._materialize(row)
+
+    def update(self, product_id, name, price, description=""):
+        with self._lock:
+            row = self._row_of.get(self._key(product_id))
+            if row is None:
+                return None
+            self._prices[row] = price
+            self._names[row] = sys.intern(name)
+            self._name_keys[row] = sys.intern(name.lower())
+            self._descriptions[row] = sys.intern(description)
+            return self._materialize(row)
+
+    def delete(self, product_id):
+        with self._lock:
+            row = self._row_of.pop(self._key(product_id), None)
+            if row is None:
+                return False
+            self._alive[row] = 0
+            self._names[row] = self._name_keys[row] = self._descriptions[row] = ""
+            # Dọn khi số hàng đã xóa vượt số hàng còn lại: chi phí trung bình O(1)
+            dead = len(self._alive) - len(self._row_of)
+            if dead > 1024 and dead > len(self._row_of):
+                self._compact()
+        return True
+
+    def _compact(self):
+        keep = [row for row, alive in enumerate(self._alive) if alive]
+        size = self.ID_SIZE
+        self._ids = bytearray(b"".join(self._ids[r * size:(r + 1) * size] for r in keep))
+        self._prices = array("d", (self._prices[r] for r in keep))
+        self._names = [self._names[r] for r in keep]
+        self._name_keys = [self._name_keys[r] for r in keep]
+        self._descriptions = [self._descriptions[r] for r in keep]
+        self._alive = bytearray(b"\x01" * len(keep))
+        self._row_of = {bytes(self._ids[i * size:(i + 1) * size]): i for i in range(len(keep))}
+
+    def search(self, name=None, min_price=None, max_price=None, offset=0, limit=10):
+        """Lọc trực tiếp trên cột; chỉ các hàng thuộc trang mới được dựng thành dict."""
+        offset, limit = max(offset, 0), max(limit, 0)
+        end = offset + limit
+        with self._lock:
+            if not name and min_price is None and max_price is None:
+                rows = islice(compress(range(len(self._alive)), self._alive), offset, end)
+                return len(self._row_of), [self._materialize(r) for r in rows]
+
+            needle = name.lower() if name else None
+            lo = float("-inf") if min_price is None else min_price
+            hi = float("inf") if max_price is None else max_price
+            total, page_rows = 0, []
+            for row, (alive, price, key) in enumerate(zip(self._alive, self._prices, self._name_keys)):
+                if alive and lo <= price <= hi and (needle is None or needle in key):
+                    if offset <= total < end:
+                        page_rows.append(row)
+                    total += 1
+            return total, [self._materialize(r) for r in page_rows]
+
+
+STORAGE_BACKENDS = {
+    "dict": ProductStore,
+    "slots": SlotsProductStore,
+    "columnar": ColumnarProductStore,
+}
+
+
+def create_product_store(kind="dict"):
+    try:
+        return STORAGE_BACKENDS[kind]()
+    except KeyError:
+        raise ValueError(f"Unsupported product storage: {kind}") from None
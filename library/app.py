@@ -1,14 +1,139 @@
-from flask import Flask, render_template, request, redirect, url_for
+from flask import Flask, render_template, request, redirect, url_for, g, jsonify, has_request_context
 import sqlite3
+import threading
+import time
+from werkzeug.exceptions import ServiceUnavailable
 
 app = Flask(__name__)
 
+DATABASE = "library.db"
+STATEMENT_CACHE_SIZE = 256
+LOAN_PERIOD = "+14 days"
+DB_POOL_SIZE = 8
+DB_POOL_TIMEOUT = 30.0
+
+# --- Đo thời gian truy cập DB theo route ---
+# metrics_hook(event, route, seconds) được gọi cho mỗi lần mở kết nối ("connect")
+# và mỗi câu lệnh ("query"); thay bằng set_metrics_hook() để đẩy sang hệ thống giám sát.
+db_metrics = {}
+_metrics_lock = threading.Lock()
+
+def record_db_metric(event, route, seconds):
+    with _metrics_lock:
+        stats = db_metrics.setdefault(route, {}).setdefault(event, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        ms = seconds * 1000
+        stats["count"] += 1
+        stats["total_ms"] += ms
+        stats["max_ms"] = max(stats["max_ms"], ms)
+
+metrics_hook = record_db_metric
+
+def set_metrics_hook(hook):
+    global metrics_hook
+    metrics_hook = hook
+
+def _report(event, seconds):
+    route = request.endpoint if has_request_context() else None
+    metrics_hook(event, route or "-", seconds)
+
+class TimedConnection(sqlite3.Connection):
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _report("query", time.perf_counter() - start)
+
 # --- Hàm kết nối DB ---
 def get_db_connection():
-    conn = sqlite3.connect("library.db")
+    start = time.perf_counter()
+    conn = sqlite3.connect(DATABASE, factory=TimedConnection, cached_statements=STATEMENT_CACHE_SIZE,
+                           check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    _report("connect", time.perf_counter() - start)
     return conn
 
+class PoolTimeout(ServiceUnavailable):
+    description = "Hết kết nối CSDL, vui lòng thử lại sau."
+
+# --- Pool kết nối có giới hạn ---
+# Dev server của Werkzeug tạo luồng mới cho mỗi request, nên kết nối được giữ trong
+# pool dùng chung (kèm cache câu lệnh đã biên dịch) thay vì gắn với luồng.
+# Mở dần tới `size` kết nối; khi hết, request chờ tối đa `timeout` giây rồi trả 503.
+class ConnectionPool:
+    def __init__(self, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT):
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._opened = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self.checkouts = 0
+        self.waits = 0
+
+    def acquire(self):
+        with self._cond:
+            self.checkouts += 1
+            if not self._idle and self._opened >= self.size:
+                self.waits += 1
+                available = lambda: self._idle or self._opened < self.size
+                if not self._cond.wait_for(available, self.timeout):
+                    raise PoolTimeout()
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                self._opened += 1
+            self._in_use += 1
+        if conn is None:
+            try:
+                conn = get_db_connection()
+            except Exception:
+                with self._cond:
+                    self._opened -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        return conn
+
+    def release(self, conn):
+        # Không trả về pool một kết nối còn giao dịch dở dang
+        if conn.in_transaction:
+            conn.rollback()
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {"size": self.size, "opened": self._opened, "in_use": self._in_use,
+                    "idle": len(self._idle), "checkouts": self.checkouts, "waits": self.waits}
+
+db_pool = ConnectionPool()
+
+# Request lấy kết nối qua get_db(); teardown_appcontext trả kết nối về pool.
+def get_db():
+    if "db" not in g:
+        g.db = db_pool.acquire()
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception):
+    conn = g.pop("db", None)
+    if conn is not None:
+        db_pool.release(conn)
+
+@app.route("/debug/db-metrics")
+def db_metrics_report():
+    with _metrics_lock:
+        return jsonify(db_metrics)
+
+@app.route("/debug/db-pool")
+def db_pool_report():
+    return jsonify(db_pool.stats())
+
 # --- Khởi tạo bảng (chạy 1 lần) ---
 def init_db():
     conn = get_db_connection()
@@ -24,18 +149,140 @@ def init_db():
                         book_id INTEGER,
                         borrower TEXT,
                         returned INTEGER DEFAULT 0,
+                        borrowed_at TEXT,
+                        due_at TEXT,
+                        returned_at TEXT,
                         FOREIGN KEY(book_id) REFERENCES books(id)
                     )''')
+    for column in ("borrowed_at", "due_at", "returned_at"):
+        ensure_column(cursor, "borrows", column, "TEXT")
+    # Lọc theo trạng thái: index (available) kèm rowid nên duyệt theo id không cần sắp xếp
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_available ON books(available)")
+    # Index một phần chỉ chứa các lượt mượn chưa trả: tra cứu khi trả sách không quét bảng
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_borrows_open ON borrows(book_id) WHERE returned = 0")
+    init_search_index(cursor)
+    init_borrow_stats(cursor)
     conn.commit()
     conn.close()
 
-# --- Trang chủ: danh sách sách ---
+def ensure_column(cursor, table, column, decl):
+    columns = [r[1] for r in cursor.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+# --- Bảng tổng hợp cho thống kê mượn sách ---
+# Được cập nhật ngay trong giao dịch mượn/trả, nên các endpoint /stats chỉ đọc
+# vài dòng qua index thay vì GROUP BY trên toàn bộ bảng borrows.
+def init_borrow_stats(cursor):
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'book_borrow_counts'"
+    ).fetchone()
+    cursor.execute('''CREATE TABLE IF NOT EXISTS book_borrow_counts (
+                        book_id INTEGER PRIMARY KEY,
+                        borrow_count INTEGER NOT NULL DEFAULT 0,
+                        FOREIGN KEY(book_id) REFERENCES books(id)
+                    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS borrower_active (
+                        borrower TEXT PRIMARY KEY,
+                        active_count INTEGER NOT NULL DEFAULT 0
+                    )''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_book_borrow_counts_count ON book_borrow_counts(borrow_count DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_borrower_active_count ON borrower_active(active_count DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_borrows_overdue ON borrows(due_at) WHERE returned = 0")
+    if not exists:
+        # CSDL có sẵn dữ liệu: tính tổng hợp một lần từ lịch sử mượn
+        cursor.execute('''INSERT INTO book_borrow_counts (book_id, borrow_count)
+                          SELECT book_id, COUNT(*) FROM borrows GROUP BY book_id''')
+        cursor.execute('''INSERT INTO borrower_active (borrower, active_count)
+                          SELECT borrower, COUNT(*) FROM borrows WHERE returned = 0 GROUP BY borrower''')
+
+# --- Chỉ mục tìm kiếm toàn văn (FTS5) cho tiêu đề/tác giả, đồng bộ bằng trigger ---
+def init_search_index(cursor):
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+    ).fetchone()
+    cursor.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+                        title, author,
+                        content='books', content_rowid='id',
+                        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                    )''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+                        INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+                    END''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+                        INSERT INTO books_fts (books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+                    END''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title, author ON books BEGIN
+                        INSERT INTO books_fts (books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author);
+                        INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+                    END''')
+    if not exists:
+        # CSDL có sẵn dữ liệu: dựng chỉ mục từ bảng books
+        cursor.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+
+def build_match_query(q):
+    # Mỗi từ được đặt trong ngoặc kép (vô hiệu toán tử FTS5) và khớp theo tiền tố
+    return " ".join('"' + t.replace('"', '""') + '"*' for t in q.split())
+
+PAGE_SIZES = (10, 20, 50, 100)
+DEFAULT_PAGE_SIZE = 20
+STATUS_FILTERS = {"all": None, "available": 1, "borrowed": 0}
+
+# --- Trang chủ: danh sách sách (phân trang theo id, lọc và tìm kiếm) ---
 @app.route("/")
 def index():
-    conn = get_db_connection()
-    books = conn.execute("SELECT * FROM books").fetchall()
-    conn.close()
-    return render_template("index.html", books=books)
+    q = request.args.get("q", "").strip()
+    status = request.args.get("status", "all")
+    if status not in STATUS_FILTERS:
+        status = "all"
+    per_page = request.args.get("per_page", DEFAULT_PAGE_SIZE, type=int)
+    if per_page not in PAGE_SIZES:
+        per_page = DEFAULT_PAGE_SIZE
+    after = request.args.get("after", type=int)
+    before = request.args.get("before", type=int)
+
+    # Phân trang keyset (id > after / id < before) thay vì OFFSET,
+    # nên chi phí mỗi trang không tăng theo kích thước thư viện.
+    source = "books b"
+    where, params = [], []
+    if q:
+        source = "books_fts JOIN books b ON b.id = books_fts.rowid"
+        where.append("books_fts MATCH ?")
+        params.append(build_match_query(q))
+    if STATUS_FILTERS[status] is not None:
+        where.append("b.available = ?")
+        params.append(STATUS_FILTERS[status])
+    if before is not None:
+        where.append("b.id < ?")
+        params.append(before)
+        order = "DESC"
+    else:
+        if after is not None:
+            where.append("b.id > ?")
+            params.append(after)
+        order = "ASC"
+    sql = f"SELECT b.* FROM {source}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY b.id {order} LIMIT ?"
+    params.append(per_page + 1)
+
+    books = get_db().execute(sql, params).fetchall()
+
+    has_more = len(books) > per_page
+    books = books[:per_page]
+    if before is not None:
+        books.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after is not None, has_more
+
+    filters = {"q": q, "status": status, "per_page": per_page}
+    link_args = {k: v for k, v in filters.items() if v}
+    prev_url = url_for("index", before=books[0]["id"], **link_args) if books and has_prev else None
+    next_url = url_for("index", after=books[-1]["id"], **link_args) if books and has_next else None
+    return render_template("index.html", books=books, filters=filters, page_sizes=PAGE_SIZES,
+                           prev_url=prev_url, next_url=next_url)
 
 # --- Thêm sách ---
 @app.route("/add", methods=["GET", "POST"])
@@ -43,52 +290,105 @@ def add_book():
     if request.method == "POST":
         title = request.form["title"]
         author = request.form["author"]
-        conn = get_db_connection()
+        conn = get_db()
         conn.execute("INSERT INTO books (title, author, available) VALUES (?, ?, 1)", (title, author))
         conn.commit()
-        conn.close()
         return redirect(url_for("index"))
     return render_template("add_book.html")
 
 # --- Mượn sách ---
 @app.route("/borrow/<int:book_id>", methods=["GET", "POST"])
 def borrow(book_id):
-    conn = get_db_connection()
-    book = conn.execute("SELECT * FROM books WHERE id = ? AND available = 1", (book_id,)).fetchone()
-    if not book:
-        conn.close()
-        return "Sách không có sẵn hoặc không tồn tại!"
-    
+    conn = get_db()
     if request.method == "POST":
         borrower = request.form["borrower"]
-        conn.execute("INSERT INTO borrows (book_id, borrower) VALUES (?, ?)", (book_id, borrower))
-        conn.execute("UPDATE books SET available = 0 WHERE id = ?", (book_id,))
-        conn.commit()
-        conn.close()
+        # Một giao dịch ghi duy nhất: UPDATE có điều kiện chỉ thành công với
+        # đúng một người mượn khi nhiều yêu cầu đến cùng lúc.
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.execute("UPDATE books SET available = 0 WHERE id = ? AND available = 1", (book_id,))
+            if cur.rowcount == 0:
+                conn.rollback()
+                return "Sách không có sẵn hoặc không tồn tại!"
+            conn.execute('''INSERT INTO borrows (book_id, borrower, borrowed_at, due_at)
+                            VALUES (?, ?, datetime('now'), datetime('now', ?))''', (book_id, borrower, LOAN_PERIOD))
+            conn.execute('''INSERT INTO book_borrow_counts (book_id, borrow_count) VALUES (?, 1)
+                            ON CONFLICT(book_id) DO UPDATE SET borrow_count = borrow_count + 1''', (book_id,))
+            conn.execute('''INSERT INTO borrower_active (borrower, active_count) VALUES (?, 1)
+                            ON CONFLICT(borrower) DO UPDATE SET active_count = active_count + 1''', (borrower,))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
         return redirect(url_for("index"))
 
-    conn.close()
+    book = conn.execute("SELECT * FROM books WHERE id = ? AND available = 1", (book_id,)).fetchone()
+    if not book:
+        return "Sách không có sẵn hoặc không tồn tại!"
     return render_template("borrow.html", book=book)
 
 # --- Trả sách ---
 @app.route("/return/<int:book_id>", methods=["GET", "POST"])
 def return_book(book_id):
-    conn = get_db_connection()
-    borrow_record = conn.execute("SELECT * FROM borrows WHERE book_id = ? AND returned = 0", (book_id,)).fetchone()
-    if not borrow_record:
-        conn.close()
-        return "Không có thông tin mượn sách hoặc sách đã được trả!"
-    
+    conn = get_db()
     if request.method == "POST":
-        conn.execute("UPDATE borrows SET returned = 1 WHERE id = ?", (borrow_record["id"],))
-        conn.execute("UPDATE books SET available = 1 WHERE id = ?", (book_id,))
-        conn.commit()
-        conn.close()
+        # Đóng lượt mượn đang mở (tra qua idx_borrows_open) và trả sách trong cùng giao dịch
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            record = conn.execute('''SELECT id, borrower FROM borrows
+                                     WHERE book_id = ? AND returned = 0
+                                     ORDER BY id LIMIT 1''', (book_id,)).fetchone()
+            if record is None:
+                conn.rollback()
+                return "Không có thông tin mượn sách hoặc sách đã được trả!"
+            conn.execute("UPDATE borrows SET returned = 1, returned_at = datetime('now') WHERE id = ?", (record["id"],))
+            conn.execute("UPDATE books SET available = 1 WHERE id = ?", (book_id,))
+            conn.execute("UPDATE borrower_active SET active_count = active_count - 1 WHERE borrower = ?",
+                         (record["borrower"],))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
         return redirect(url_for("index"))
 
-    conn.close()
+    borrow_record = conn.execute("SELECT * FROM borrows WHERE book_id = ? AND returned = 0", (book_id,)).fetchone()
+    if not borrow_record:
+        return "Không có thông tin mượn sách hoặc sách đã được trả!"
     return render_template("return.html", book_id=book_id)
 
+# --- Thống kê (JSON cho dashboard) ---
+def stats_limit(default=10, maximum=100):
+    limit = request.args.get("limit", default, type=int)
+    return max(1, min(limit, maximum))
+
+@app.route("/stats/top-books")
+def stats_top_books():
+    rows = get_db().execute('''SELECT c.book_id, b.title, b.author, c.borrow_count
+                               FROM book_borrow_counts c JOIN books b ON b.id = c.book_id
+                               ORDER BY c.borrow_count DESC LIMIT ?''', (stats_limit(),)).fetchall()
+    return jsonify([dict(r) for r in rows])
+
+@app.route("/stats/borrowers")
+def stats_borrowers():
+    rows = get_db().execute('''SELECT borrower, active_count FROM borrower_active
+                               WHERE active_count > 0
+                               ORDER BY active_count DESC LIMIT ?''', (stats_limit(),)).fetchall()
+    return jsonify([dict(r) for r in rows])
+
+@app.route("/stats/borrowers/<borrower>")
+def stats_borrower(borrower):
+    row = get_db().execute("SELECT active_count FROM borrower_active WHERE borrower = ?", (borrower,)).fetchone()
+    return jsonify({"borrower": borrower, "active_count": row["active_count"] if row else 0})
+
+@app.route("/stats/overdue")
+def stats_overdue():
+    # Duyệt idx_borrows_overdue (chỉ lượt chưa trả) theo hạn trả, dừng ở thời điểm hiện tại
+    rows = get_db().execute('''SELECT r.id, r.book_id, b.title, r.borrower, r.borrowed_at, r.due_at
+                               FROM borrows r JOIN books b ON b.id = r.book_id
+                               WHERE r.returned = 0 AND r.due_at < datetime('now')
+                               ORDER BY r.due_at LIMIT ?''', (stats_limit(50, 500),)).fetchall()
+    return jsonify([dict(r) for r in rows])
+
 if __name__ == "__main__":
     init_db()
     app.run(debug=True)